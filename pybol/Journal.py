@@ -0,0 +1,130 @@
+"""
+:mod:`pybol.Journal` --- Resumable assembly
+==========================================
+
+The :mod:`pybol.Journal` records the completed operations of an assembly in
+a small file so that an interrupted assembly can be resumed instead of
+restarted. Entries are buffered and flushed in batches to keep the overhead
+low.
+
+.. autoclass:: Journal
+
+"""
+
+
+import io
+import os
+import sys
+import threading
+import logging
+
+from .utils import path_size
+
+logger = logging.getLogger("PyBOL")
+
+# undecodable file names survive a round trip through the journal on Python 3
+_ERRORS = 'surrogateescape' if sys.version_info[0] >= 3 else 'strict'
+
+
+class Journal(object):
+    """On-disk record of completed copy operations.
+
+    Each line holds the size of a finished destination entry and its path
+    relative to the destination, encoded as UTF-8. A partially written last
+    line, as left behind by a killed process, is ignored.
+
+    The journal is kept next to the destination by default, so that entries
+    replacing the whole destination tree do not delete it.
+
+    Keyword arguments:
+    dest -- destination path of the assembly.
+    path -- journal file; defaults to `dest` followed by `SUFFIX`.
+    resume -- keep and load an existing journal instead of truncating it.
+    batch_size -- number of operations buffered before a flush.
+    """
+
+    SUFFIX = '.pybol_journal'
+
+    def __init__(self, dest, path=None, resume=False, batch_size=100):
+        self._dest = dest
+        self._path = path or os.path.normpath(dest) + self.SUFFIX
+        self._batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        if resume:
+            self._load()
+            logger.info('Loaded %d journal entries from \'%s\'',
+                        len(self._entries), self._path)
+        self._file = io.open(self._path, 'a' if resume else 'w', encoding='utf-8', errors=_ERRORS)
+
+    @property
+    def path(self):
+        return self._path
+
+    def _load(self):
+        complete = 0
+        try:
+            with open(self._path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    complete += len(line)
+                    try:
+                        size, name = line.decode('utf-8', _ERRORS).rstrip('\n').split('\t', 1)
+                        self._entries[name] = int(size)
+                    except ValueError:
+                        continue
+        except IOError:
+            logger.info('No journal found at \'%s\'', self._path)
+            return
+
+        # drop a torn last line so that new records start on a fresh line
+        if os.path.getsize(self._path) > complete:
+            with open(self._path, 'r+b') as f:
+                f.truncate(complete)
+
+    def _name(self, dest_f):
+        return os.path.relpath(dest_f, self._dest)
+
+    def done(self, dest_f):
+        """Returns True if `dest_f` was completed by a previous run and its
+        size still matches the recorded one.
+        """
+        size = self._entries.get(self._name(dest_f))
+        if size is None or not os.path.exists(dest_f):
+            return False
+        return path_size(dest_f) == size
+
+    def record(self, dest_f):
+        """Records `dest_f` as completed.
+        """
+        line = u'{0}\t{1}\n'.format(path_size(dest_f), self._name(dest_f))
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self._batch_size:
+                self._flush()
+
+    def flush(self):
+        """Writes buffered entries to disk.
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write(u''.join(self._buffer))
+            self._file.flush()
+            del self._buffer[:]
+
+    def close(self, remove=False):
+        """Flushes and closes the journal.
+
+        Keyword arguments:
+        remove -- delete the journal file, e.g. once the assembly completed.
+        """
+        self.flush()
+        self._file.close()
+        if remove and os.path.exists(self._path):
+            os.remove(self._path)
@@ -15,10 +15,19 @@ import yaml
 import os
 import shutil
 import logging 
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .utils import makedirs, device, same_content, unshare, prune
+from .Journal import Journal
+from .log import Progress
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("PyBOL")
-logger.info("Starting PyBOL logging")
+logger.addHandler(logging.NullHandler())
 
 class Manifest(object):
     """Tool for managing a multistate workflow. Requires a properly formatted
@@ -30,13 +39,13 @@ class Manifest(object):
         self._path = ''
         if filename:
             try:
-                logger.info('Loading manifest file \'{}\''.format(filename))
+                logger.info('Loading manifest file \'%s\'', filename)
                 with open(filename, 'r') as f:
                     raw = yaml.safe_load(f)
                     self.path = raw.pop('path')
                 logger.info('Loaded manifest file')
             except IOError as e:
-                logger.error('Could not open file \'{}\''.format(filename))
+                logger.error('Could not open file \'%s\'', filename)
                 raise
             except KeyError as e:
                 logger.error('No path provided. Check manifest file')
@@ -54,7 +63,7 @@ class Manifest(object):
     @path.setter
     def path(self, path):
         if not os.path.exists(path):
-            logger.warning('Path \'{}\' does not exist'.format(path))
+            logger.warning('Path \'%s\' does not exist', path)
         self._path = path
 
     @property
@@ -81,25 +90,102 @@ class Manifest(object):
         if not name in self._states or force:
             self._states[name] = State(name, files=files, options=options)
         else:
-            logger.error('State {} already exists'.format(name))
+            logger.error('State %s already exists', name)
 
     def remove_state(self, name):
         try:
-            logger.info('Removing state:', name)
+            logger.info('Removing state: %s', name)
             self._states.pop(name)
         except KeyError:
-            logger.error('No state', name)
+            logger.error('No state %s', name)
 
-    def assemble(self, state, dest):
+    def assemble(self, state, dest, scheduler=None, journal=False, resume=False,
+                 link=False, progress=None):
         """Builds the specified state.
 
         Keyword arguments:
         state -- a state from the manifest file.
-        dest -- destination path.
+        dest -- destination path, or a list of destination paths to fan out
+                to. Each source file is then read only once.
+        scheduler -- optional :class:`~pybol.Scheduler` used to copy entries
+                     concurrently, largest first.
+        journal -- record completed entries in a journal; True places it next
+                   to `dest`, a string gives its path.
+        resume -- skip entries completed by a previous, interrupted run.
+                  Implies `journal`.
+        link -- when fanning out, hardlink files into destinations that share
+                a filesystem instead of writing them again.
+        progress -- :class:`~pybol.log.Progress` reporting aggregated
+                    progress; a default one is used if not given.
         """
-        logger.info('Assembling state \'{0}\' in \'{1}\''.format(state,dest))
-        self.states[state].assemble(self.path, dest)
-        logger.info('Assembled state \'{}\''.format(state))
+        logger.info('Assembling state \'%s\' in \'%s\'', state, dest)
+        self.states[state].assemble(self.path, dest, scheduler=scheduler,
+                                    journal=journal, resume=resume, link=link,
+                                    progress=progress)
+        logger.info('Assembled state \'%s\'', state)
+
+    def switch(self, dest, from_state, to_state, scheduler=None, progress=None,
+               trust_mtime=False):
+        """Moves a destination assembled from one state to another state.
+
+        Entries of `from_state` that are not part of `to_state` are removed,
+        along with directories left empty by the removal. Entries shared by
+        both states are left untouched if their sources resolve to the same
+        path or hold the same bytes; all others are copied.
+
+        Keyword arguments:
+        dest -- destination path currently holding `from_state`.
+        from_state -- the state assembled in `dest`.
+        to_state -- the state to switch to.
+        scheduler -- optional :class:`~pybol.Scheduler` used for the copies.
+        progress -- :class:`~pybol.log.Progress` reporting aggregated
+                    progress; a default one is used if not given.
+        trust_mtime -- treat shared files of equal size and modification time
+                       as unchanged without reading them.
+        """
+        logger.info('Switching \'%s\' from \'%s\' to \'%s\'',
+                    dest, from_state, to_state)
+        old = dict((os.path.normpath(d), s)
+                   for s, d in self.states[from_state]._operations(self.path, dest))
+        new = [(s, d) for s, d in self.states[to_state]._operations(self.path, dest)]
+        targets = set(os.path.normpath(d) for s, d in new)
+
+        for d in old:
+            if d not in targets and os.path.lexists(d):
+                logger.debug('Removing %s', d)
+                if os.path.isdir(d) and not os.path.islink(d):
+                    shutil.rmtree(d)
+                else:
+                    os.remove(d)
+                prune(os.path.dirname(d), dest)
+
+        operations = []
+        for s, d in new:
+            key = os.path.normpath(d)
+            if (key in old and os.path.lexists(d)
+                    and same_content(old[key], s, trust_mtime=trust_mtime)):
+                continue
+            operations.append((s, d))
+        logger.info('%d of %d entries differ', len(operations), len(new))
+
+        for s, d in operations:
+            if not os.path.exists(os.path.dirname(d)):
+                makedirs(os.path.dirname(d))
+
+        progress = progress or Progress()
+        progress.start(to_state, len(operations))
+
+        def copy(s, d):
+            State._copy(s, d)
+            progress.update()
+
+        if scheduler is None:
+            for s, d in operations:
+                copy(s, d)
+        else:
+            scheduler.run(operations, copy)
+        progress.finish()
+        logger.info('Switched \'%s\' to \'%s\'', dest, to_state)
 
     def _build_states(self, data):
         """Iterates through all states in the manifest file and populates the 
@@ -117,7 +203,7 @@ class Manifest(object):
             try:
                 self.add_state(key, files=data[key]['files'], options=options)
             except TypeError:
-                logger.error('Missing file list in state {}'.format(key))
+                logger.error('Missing file list in state %s', key)
                 raise
 
     def __len__(self):
@@ -143,7 +229,7 @@ class State(object):
                     current_option = o
                     self._option_dict[o] = True
             except KeyError:
-                logger.error('Unknown option: {}'.format(current_option))
+                logger.error('Unknown option: %s', current_option)
                 raise
 
             logger.info('Options are applied at assembly')
@@ -156,7 +242,7 @@ class State(object):
     @name.setter
     def name(self, name):
         if isinstance(name, str):
-            logger.info('Setting state name to {}'.format(name))
+            logger.info('Setting state name to %s', name)
             self._name = name
         else:
             logger.error('Could not set state name. Must be a string')
@@ -176,40 +262,254 @@ class State(object):
         """
         del self.files[:]
 
-    def assemble(self, src_path, dest):
+    def assemble(self, src_path, dest, scheduler=None, journal=False, resume=False,
+                 link=False, progress=None):
         """Builds a state according to the information provided in the
         manifest file.
 
         Keyword arguments:
         src_path -- path containing all of the states.
-        dest -- destination path. 
+        dest -- destination path, or a list of destination paths. With
+                several destinations every source file is read once and
+                written to all of them.
+        scheduler -- optional :class:`~pybol.Scheduler`. Without one the
+                     entries are copied one by one in manifest order.
+        journal -- record completed entries in a :class:`~pybol.Journal`;
+                   True places it next to `dest`, a string gives its path.
+                   The journal is removed once the state is fully assembled.
+        resume -- skip entries that a previous run recorded as completed
+                  and whose size is unchanged. Implies `journal`.
+        link -- when fanning out, write each file once per filesystem and
+                hardlink it into the other destinations on that filesystem.
+                Linked files are unlinked before they are written again, so
+                a later assembly into one destination leaves the others
+                untouched. Editing a linked file in place changes it in
+                every destination.
+        progress -- :class:`~pybol.log.Progress` logging a summary every
+                    few entries or seconds; a default one is used if not
+                    given. Per-entry messages are logged at DEBUG level.
 
         """
         
+        if isinstance(dest, (list, tuple)):
+            dests, seen = [], set()
+            for d in dest:
+                key = os.path.realpath(d)
+                if key not in seen:
+                    seen.add(key)
+                    dests.append(os.path.normpath(d))
+        else:
+            dests = [dest]
+        if not dests:
+            raise ValueError('No destination given')
+        if isinstance(journal, str) and len(dests) > 1:
+            raise ValueError('A journal path cannot be shared by several destinations')
+
+        per_dest = [self._operations(src_path, d) for d in dests]
+        operations = [(ops[0][0], tuple(op[1] for op in ops))
+                      for ops in zip(*per_dest)]
+
+        journals = []
+        journal_of = {}
+        if journal or resume:
+            path = journal if isinstance(journal, str) else None
+            for d, ops in zip(dests, per_dest):
+                makedirs(d)
+                jrnl = Journal(d, path=path, resume=resume)
+                journals.append(jrnl)
+                for src_path_f, dest_f in ops:
+                    if (os.path.isdir(src_path_f) and
+                            jrnl.path.startswith(os.path.normpath(dest_f) + os.sep)):
+                        for j in journals:
+                            j.close()
+                        raise ValueError('Journal \'{0}\' lies inside \'{1}\', '
+                                         'which is replaced during assembly'.format(
+                                             jrnl.path, dest_f))
+                    journal_of[dest_f] = jrnl
+            if resume:
+                remaining = []
+                # entries below a tree that is copied again get wiped with it
+                redone = []
+                for src_path_f, dest_fs in operations:
+                    todo = []
+                    for dest_f in dest_fs:
+                        prefix = os.path.normpath(dest_f) + os.sep
+                        if (not journal_of[dest_f].done(dest_f) or
+                                any(prefix.startswith(r) for r in redone)):
+                            todo.append(dest_f)
+                            redone.append(prefix)
+                    if todo:
+                        remaining.append((src_path_f, tuple(todo)))
+                logger.info('Resuming %s: %d of %d entries left',
+                            self.name, len(remaining), len(operations))
+                operations = remaining
+
+        for src_path_f, dest_fs in operations:
+            for dest_f in dest_fs:
+                if not os.path.exists(os.path.dirname(dest_f)):
+                    logger.debug("Creating directory tree")
+                    makedirs(os.path.dirname(dest_f))
+
+        progress = progress or Progress()
+        progress.start(self.name, len(operations))
+
+        def copy(src_path_f, dest_fs):
+            if len(dest_fs) == 1:
+                self._copy(src_path_f, dest_fs[0])
+            else:
+                self._fanout(src_path_f, dest_fs, link=link)
+            for dest_f in dest_fs:
+                if dest_f in journal_of:
+                    journal_of[dest_f].record(dest_f)
+            progress.update()
+
+        try:
+            if scheduler is None:
+                for src_path_f, dest_fs in operations:
+                    copy(src_path_f, dest_fs)
+            else:
+                scheduler.run(operations, copy)
+        except:
+            for jrnl in journals:
+                jrnl.close()
+            raise
+
+        for jrnl in journals:
+            jrnl.close(remove=True)
+        progress.finish()
+
+        logger.info("%s build complete...", self.name)
+
+    def _operations(self, src_path, dest):
+        """Returns the (source, destination) pairs of the state in manifest
+        order.
+
+        Keyword arguments:
+        src_path -- path containing all of the states.
+        dest -- destination path.
+        """
         dirname = os.path.join(src_path, self.name)
 
         if len(self._options) > 0:
             if self._option_dict['full_transfer']:
-                logger.info('Applying full transfer option to state {}'.format(self.name))
+                logger.info('Applying full transfer option to state %s', self.name)
                 self.files = os.listdir(dirname)
                 self.files = [[x,x] for x in self.files] 
-    
-        for f in self.files:
-            src_path_f = os.path.join(dirname, f[0])
-            dest_f = os.path.join(dest, f[1])
-            logger.info("Copying from {0} --> {1}".format(src_path_f,dest_f))
-            if not os.path.exists(os.path.dirname(dest_f)):
-                logger.info("Creating directory tree")
-                os.makedirs(os.path.dirname(dest_f))
-            
-            if os.path.isdir(src_path_f):
-                if os.path.exists(dest_f):
-                    shutil.rmtree(dest_f)
-                shutil.copytree(src_path_f,dest_f)
-            else:
-                shutil.copyfile(src_path_f, dest_f)
 
-        logger.info("{0} build complete...".format(self.name))
+        return [(os.path.join(dirname, f[0]), os.path.join(dest, f[1]))
+                for f in self.files]
+
+    @staticmethod
+    def _copy(src_path_f, dest_f):
+        """Copies a single file or directory tree, replacing an existing
+        destination tree.
+        """
+        logger.debug("Copying from %s --> %s", src_path_f, dest_f)
+        if os.path.isdir(src_path_f):
+            if os.path.exists(dest_f):
+                shutil.rmtree(dest_f)
+            shutil.copytree(src_path_f,dest_f)
+        else:
+            unshare(dest_f)
+            shutil.copyfile(src_path_f, dest_f)
+
+    @classmethod
+    def _fanout(cls, src_path_f, dest_fs, link=False):
+        """Copies a single file or directory tree to several destinations,
+        reading the source only once.
+        """
+        logger.debug("Copying from %s --> %s", src_path_f, dest_fs)
+        if not os.path.isdir(src_path_f):
+            cls._fanout_file(src_path_f, dest_fs, link=link)
+            return
+
+        for dest_f in dest_fs:
+            if os.path.exists(dest_f):
+                shutil.rmtree(dest_f)
+        # follow symlinked directories like shutil.copytree does
+        for root, dirs, files in os.walk(src_path_f, followlinks=True):
+            rel = os.path.relpath(root, src_path_f)
+            targets = [os.path.normpath(os.path.join(d, rel)) for d in dest_fs]
+            for target in targets:
+                makedirs(target)
+            for name in files:
+                cls._fanout_file(os.path.join(root, name),
+                                 [os.path.join(t, name) for t in targets],
+                                 link=link, stat=True)
+            for target in targets:
+                shutil.copystat(root, target)
+
+    @staticmethod
+    def _fanout_file(src_path_f, dest_fs, link=False, stat=False, chunk=1024 ** 2):
+        """Streams one file into every destination, with one writer thread
+        per destination fed by a single read. With `link`, only the first
+        destination on each filesystem is written and the others are
+        hardlinked to it.
+        """
+        primaries = {}
+        links = []
+        for dest_f in dest_fs:
+            dev = device(dest_f) if link else dest_f
+            if dev not in primaries:
+                primaries[dev] = dest_f
+            elif primaries[dev] != dest_f:
+                links.append((primaries[dev], dest_f))
+
+        written = list(primaries.values())
+        for dest_f in written:
+            unshare(dest_f)
+
+        errors = []
+
+        def write(dest_f, chunks):
+            try:
+                with open(dest_f, 'wb') as fdst:
+                    while True:
+                        buf = chunks.get()
+                        if buf is None:
+                            return
+                        if not errors:
+                            fdst.write(buf)
+            except Exception as e:
+                errors.append(e)
+                while chunks.get() is not None:
+                    pass
+
+        queues = [queue.Queue(4) for dest_f in written]
+        writers = [threading.Thread(target=write, args=(dest_f, chunks))
+                   for dest_f, chunks in zip(written, queues)]
+        for t in writers:
+            t.daemon = True
+            t.start()
+        try:
+            with open(src_path_f, 'rb') as fsrc:
+                while not errors:
+                    buf = fsrc.read(chunk)
+                    if not buf:
+                        break
+                    for chunks in queues:
+                        chunks.put(buf)
+        finally:
+            for chunks in queues:
+                chunks.put(None)
+            for t in writers:
+                t.join()
+        if errors:
+            raise errors[0]
+
+        if stat:
+            for dest_f in written:
+                shutil.copystat(src_path_f, dest_f)
+
+        for primary, dest_f in links:
+            if os.path.lexists(dest_f):
+                os.remove(dest_f)
+            try:
+                os.link(primary, dest_f)
+            except OSError:
+                shutil.copyfile(primary, dest_f)
+                if stat:
+                    shutil.copystat(primary, dest_f)
 
     def __str__(self):
         return "{0} -- {1}".format(self.name, self.files)
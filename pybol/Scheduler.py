@@ -0,0 +1,166 @@
+"""
+:mod:`pybol.Scheduler` --- Size-aware copy scheduling
+====================================================
+
+The :mod:`pybol.Scheduler` orders and interleaves the copy operations of a
+state by size. The largest entries are started first on dedicated workers
+while small entries are streamed alongside them, so a state that mixes a few
+huge files with many tiny ones keeps both the bandwidth and the metadata path
+busy instead of alternating between them.
+
+.. autoclass:: Scheduler
+
+"""
+
+
+import os
+import threading
+import logging
+from collections import deque
+
+from .utils import path_size, device
+
+logger = logging.getLogger("PyBOL")
+
+
+class Scheduler(object):
+    """Runs copy operations concurrently, largest first.
+
+    Keyword arguments:
+    large_workers -- number of workers dedicated to large entries. Once the
+                     large entries are exhausted these workers help with the
+                     small ones.
+    small_workers -- number of workers that only copy small entries.
+    threshold -- size in bytes at or above which an entry counts as large.
+    device_limits -- dict mapping a path to the maximum number of concurrent
+                     operations allowed on the volume holding that path.
+    default_device_limit -- limit applied to every other volume; None means
+                            no limit.
+    """
+
+    def __init__(self, large_workers=2, small_workers=8,
+                 threshold=64 * 1024 ** 2, device_limits=None,
+                 default_device_limit=None):
+        if large_workers < 1:
+            raise ValueError('Scheduler needs at least one large worker')
+        if small_workers < 0:
+            raise ValueError('Number of small workers cannot be negative')
+        self.large_workers = large_workers
+        self.small_workers = small_workers
+        self.threshold = threshold
+        self.default_device_limit = default_device_limit
+
+        self._device_limits = {}
+        if device_limits:
+            for path, limit in device_limits.items():
+                self._device_limits[device(path)] = limit
+
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def run(self, operations, func):
+        """Executes `func(src, dest)` for every operation.
+
+        Operations whose destinations overlap are run serially in manifest
+        order, since a later entry is allowed to overwrite an earlier one.
+
+        Keyword arguments:
+        operations -- list of (src, dest) tuples in manifest order. `dest`
+                      may also be a tuple of destinations for fan-out copies.
+        func -- callable performing a single copy.
+        """
+        operations = list(operations)
+        if not operations:
+            return
+
+        if self._overlapping(operations):
+            logger.info('Overlapping destinations, copying in manifest order')
+            for src, dest in operations:
+                func(src, dest)
+            return
+
+        sized = [(path_size(op[0]), op) for op in operations]
+        sized.sort(key=lambda x: x[0], reverse=True)
+
+        large = deque(op for size, op in sized if size >= self.threshold)
+        small = deque(op for size, op in sized if size < self.threshold)
+        logger.info('Scheduling %d large and %d small entries',
+                    len(large), len(small))
+
+        errors = []
+
+        def work(queues):
+            while not errors:
+                op = None
+                for q in queues:
+                    try:
+                        op = q.popleft()
+                        break
+                    except IndexError:
+                        continue
+                if op is None:
+                    return
+                try:
+                    self._execute(op, func)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = []
+        for i in range(self.large_workers):
+            threads.append(threading.Thread(target=work, args=((large, small),)))
+        for i in range(self.small_workers):
+            threads.append(threading.Thread(target=work, args=((small,),)))
+
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+
+        if errors:
+            raise errors[0]
+
+    def _execute(self, op, func):
+        """Runs a single operation while holding the semaphores of the
+        volumes it touches.
+        """
+        src, dest = op
+        semaphores = []
+        if self._device_limits or self.default_device_limit is not None:
+            devices = set([device(src)])
+            devices.update(device(d) for d in _destinations(dest))
+            for dev in sorted(devices):
+                semaphore = self._semaphore(dev)
+                if semaphore is not None:
+                    semaphores.append(semaphore)
+
+        for semaphore in semaphores:
+            semaphore.acquire()
+        try:
+            func(src, dest)
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+
+    def _semaphore(self, dev):
+        with self._lock:
+            if dev not in self._semaphores:
+                limit = self._device_limits.get(dev, self.default_device_limit)
+                if limit is None:
+                    self._semaphores[dev] = None
+                else:
+                    self._semaphores[dev] = threading.BoundedSemaphore(limit)
+            return self._semaphores[dev]
+
+    @staticmethod
+    def _overlapping(operations):
+        dests = sorted(os.path.normpath(d) + os.sep for src, dest in operations
+                       for d in _destinations(dest))
+        for a, b in zip(dests, dests[1:]):
+            if b.startswith(a):
+                return True
+        return False
+
+
+def _destinations(dest):
+    return dest if isinstance(dest, (list, tuple)) else (dest,)
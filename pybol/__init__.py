@@ -1,3 +1,6 @@
 from .Manifest import Manifest, State
+from .Scheduler import Scheduler
+from .Journal import Journal
+from .log import Progress, start_logging, stop_logging
 
 __version__ = "0.2.0"
@@ -0,0 +1,188 @@
+"""
+:mod:`pybol.log` --- Logging helpers
+====================================
+
+PyBOL logs to the ``PyBOL`` logger and leaves the global logging
+configuration to the application. Per-entry messages are emitted at DEBUG
+level; during assembly a :class:`Progress` reports aggregated progress at
+INFO level instead. :func:`start_logging` attaches a queue-based handler so
+that log I/O happens on a background thread, off the copy path.
+
+.. autoclass:: Progress
+.. autofunction:: start_logging
+.. autofunction:: stop_logging
+
+"""
+
+
+import sys
+import time
+import threading
+import logging
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:
+    class QueueHandler(logging.Handler):
+        """Minimal stand-in for :class:`logging.handlers.QueueHandler`,
+        which Python 2 lacks.
+        """
+
+        def __init__(self, records):
+            logging.Handler.__init__(self)
+            self.queue = records
+
+        def emit(self, record):
+            try:
+                # format now, so the record holds no references to arguments
+                msg = self.format(record)
+                record.msg = msg
+                record.args = None
+                record.exc_info = None
+                self.queue.put_nowait(record)
+            except Exception:
+                self.handleError(record)
+
+    class QueueListener(object):
+        """Minimal stand-in for :class:`logging.handlers.QueueListener`,
+        which Python 2 lacks.
+        """
+
+        def __init__(self, records, handler):
+            self.queue = records
+            self.handler = handler
+            self._thread = None
+
+        def start(self):
+            self._thread = threading.Thread(target=self._monitor)
+            self._thread.daemon = True
+            self._thread.start()
+
+        def _monitor(self):
+            while True:
+                record = self.queue.get()
+                if record is None:
+                    return
+                if record.levelno >= self.handler.level:
+                    self.handler.handle(record)
+
+        def stop(self):
+            self.queue.put_nowait(None)
+            self._thread.join()
+            self._thread = None
+
+logger = logging.getLogger("PyBOL")
+
+_listener = None
+_handler = None
+_saved = None
+
+
+class Progress(object):
+    """Aggregated progress reporting for a running assembly.
+
+    A summary line is logged every `every` entries or every `interval`
+    seconds, whichever comes first, rather than one line per entry.
+
+    Keyword arguments:
+    every -- number of entries between two summaries; 0 or None reports
+             by `interval` only.
+    interval -- maximum number of seconds between two summaries.
+    quiet -- do not log any progress.
+    """
+
+    def __init__(self, every=1000, interval=10.0, quiet=False):
+        if every is not None and every < 0:
+            raise ValueError('every cannot be negative')
+        self.every = every
+        self.interval = interval
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self.start('', 0)
+
+    def start(self, name, total):
+        """Resets the counters for a new run.
+
+        Keyword arguments:
+        name -- name of the state being assembled.
+        total -- number of entries that will be copied.
+        """
+        self.name = name
+        self.total = total
+        self.count = 0
+        self._next = self.every
+        self._started = self._last = time.time()
+
+    def update(self, n=1):
+        """Counts `n` finished entries and logs a summary when due.
+        """
+        with self._lock:
+            self.count += n
+            if self.quiet:
+                return
+            now = time.time()
+            due = self.every and self.count >= self._next
+            if not due and now - self._last < self.interval:
+                return
+            if self.every:
+                while self._next <= self.count:
+                    self._next += self.every
+            self._last = now
+            count = self.count
+        logger.info('%s: copied %d of %d entries', self.name, count, self.total)
+
+    def finish(self):
+        """Logs the final summary of the run.
+        """
+        if not self.quiet:
+            logger.info('%s: copied %d entries in %.1f s', self.name,
+                        self.count, time.time() - self._started)
+
+
+def start_logging(level=logging.INFO, handler=None):
+    """Sends PyBOL log records through a queue to `handler`, which is served
+    by a background thread. Only the ``PyBOL`` logger is configured.
+
+    Keyword arguments:
+    level -- level of the ``PyBOL`` logger.
+    handler -- handler doing the actual output; defaults to a stream handler
+               writing to stderr.
+    """
+    global _listener, _handler, _saved
+    stop_logging()
+
+    if handler is None:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+
+    records = queue.Queue(-1)
+    _handler = QueueHandler(records)
+    _listener = QueueListener(records, handler)
+    _listener.start()
+
+    _saved = (logger.level, logger.propagate)
+    logger.addHandler(_handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def stop_logging():
+    """Flushes pending records, detaches the handler installed by
+    :func:`start_logging` and restores the previous level and propagation
+    of the ``PyBOL`` logger.
+    """
+    global _listener, _handler, _saved
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logger.removeHandler(_handler)
+        _handler = None
+        logger.setLevel(_saved[0])
+        logger.propagate = _saved[1]
+        _saved = None
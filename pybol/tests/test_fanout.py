@@ -0,0 +1,84 @@
+import tempfile
+import pybol
+import os
+import filecmp
+
+class Test_Fanout(object):
+
+    def setup_method(self):
+        self.dir = tempfile.mkdtemp()
+        self.manifests_path = 'pybol/tests/testing_files/manifests'
+        self.dests = [os.path.join(self.dir, str(i)) for i in range(3)]
+
+    def test_fanout_files(self):
+        m = pybol.Manifest(filename=os.path.join(self.manifests_path,'full_transfer.yml'))
+        m.assemble('state_a', self.dests)
+        src = os.path.join(m.path, 'state_a', 'src', 'data', 'file_1.csv')
+        for d in self.dests:
+            assert filecmp.cmp(src, os.path.join(d, 'src', 'data', 'file_1.csv'),
+                               shallow=False)
+
+    def test_fanout_recursion(self):
+        m = pybol.Manifest(os.path.join(self.manifests_path,'recursion.yml'))
+        m.assemble('recursion', self.dests)
+        src = os.path.join(m.path, 'recursion', 'random_1')
+        for d in self.dests:
+            assert not filecmp.dircmp(src, d).diff_files
+            assert sorted(os.listdir(d)) == sorted(os.listdir(src))
+
+    def test_fanout_link(self):
+        m = pybol.Manifest(filename=os.path.join(self.manifests_path,'full_transfer.yml'))
+        m.assemble('state_a', self.dests, link=True)
+        stats = [os.stat(os.path.join(d, 'src', 'data', 'file_2.csv'))
+                 for d in self.dests]
+        assert len(set(st.st_ino for st in stats)) == 1
+
+    def test_fanout_resume(self):
+        m = pybol.Manifest(filename=os.path.join(self.manifests_path,'full_transfer.yml'))
+        m.assemble('state_a', self.dests[:1])
+        m.assemble('state_a', self.dests, resume=True)
+        for d in self.dests:
+            assert os.listdir(d) == ['src']
+
+    def test_fanout_symlinked_dir(self):
+        src = tempfile.mkdtemp()
+        tree = os.path.join(src, 'state', 'tree')
+        os.makedirs(os.path.join(tree, 'real'))
+        with open(os.path.join(tree, 'real', 'f'), 'w') as f:
+            f.write('f')
+        os.symlink('real', os.path.join(tree, 'linked'))
+        s = pybol.State('state', files=[['tree', 'tree']])
+
+        single = os.path.join(self.dir, 'single')
+        s.assemble(src, single)
+        s.assemble(src, self.dests)
+        expected = sorted(os.listdir(os.path.join(single, 'tree')))
+        assert expected == ['linked', 'real']
+        for d in self.dests:
+            assert sorted(os.listdir(os.path.join(d, 'tree'))) == expected
+            assert os.listdir(os.path.join(d, 'tree', 'linked')) == ['f']
+
+    def test_fanout_duplicate_dest(self):
+        m = pybol.Manifest(filename=os.path.join(self.manifests_path,'full_transfer.yml'))
+        d = self.dests[0]
+        m.assemble('state_a', [d, d + os.sep], link=True)
+        assert os.path.exists(os.path.join(d, 'src', 'data', 'file_1.csv'))
+
+    def test_linked_replicas_stay_independent(self):
+        src = tempfile.mkdtemp()
+        os.makedirs(os.path.join(src, 'state'))
+        path = os.path.join(src, 'state', 'f')
+        with open(path, 'w') as f:
+            f.write('old')
+        m = pybol.Manifest()
+        m.path = src
+        m.add_state('state', files=[['f', 'f']])
+        m.assemble('state', self.dests[:2], link=True)
+
+        with open(path, 'w') as f:
+            f.write('new')
+        m.assemble('state', self.dests[0])
+        with open(os.path.join(self.dests[1], 'f')) as f:
+            assert f.read() == 'old'
+        with open(os.path.join(self.dests[0], 'f')) as f:
+            assert f.read() == 'new'
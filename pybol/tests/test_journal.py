@@ -0,0 +1,129 @@
+import tempfile
+import pybol
+import os
+import io
+
+class Test_Journal(object):
+
+    def setup_method(self):
+        self.dir = tempfile.mkdtemp()
+        self.manifests_path = 'pybol/tests/testing_files/manifests'
+
+    def test_journal_removed_on_success(self):
+        m = pybol.Manifest(filename=os.path.join(self.manifests_path,'full_transfer.yml'))
+        m.assemble('state_a', self.dir, journal=True)
+        assert os.listdir(self.dir) == ['src']
+        assert not os.path.exists(os.path.normpath(self.dir) + pybol.Journal.SUFFIX)
+
+    def test_resume_skips_completed(self):
+        src = os.path.join(tempfile.mkdtemp(), 'state')
+        os.makedirs(src)
+        for name in ['a', 'b', 'c']:
+            with open(os.path.join(src, name), 'w') as f:
+                f.write(name)
+        s = pybol.State('state', files=[['a', 'a'], ['b', 'b'], ['c', 'c']])
+
+        j = pybol.Journal(self.dir)
+        for name in ['a', 'b']:
+            with open(os.path.join(self.dir, name), 'w') as f:
+                f.write('done')
+            j.record(os.path.join(self.dir, name))
+        j.close()
+        # a stale entry whose size no longer matches is copied again
+        with open(os.path.join(self.dir, 'b'), 'w') as f:
+            f.write('truncated')
+
+        s.assemble(os.path.dirname(src), self.dir, resume=True)
+        contents = {}
+        for name in ['a', 'b', 'c']:
+            with open(os.path.join(self.dir, name)) as f:
+                contents[name] = f.read()
+        assert contents == {'a': 'done', 'b': 'b', 'c': 'c'}
+        assert not os.path.exists(os.path.normpath(self.dir) + pybol.Journal.SUFFIX)
+
+    def test_partial_line_ignored(self):
+        path = os.path.normpath(self.dir) + pybol.Journal.SUFFIX
+        with open(os.path.join(self.dir, 'a'), 'w') as f:
+            f.write('a')
+        with open(path, 'w') as f:
+            f.write('1\ta\n1\tb')
+        j = pybol.Journal(self.dir, resume=True)
+        assert j.done(os.path.join(self.dir, 'a'))
+        assert not j.done(os.path.join(self.dir, 'b'))
+        j.close()
+
+    def test_resume_twice_after_torn_line(self):
+        path = os.path.normpath(self.dir) + pybol.Journal.SUFFIX
+        for name in ['a', 'c']:
+            with open(os.path.join(self.dir, name), 'w') as f:
+                f.write(name)
+        with open(path, 'w') as f:
+            f.write('1\ta\n1\tb')
+        j = pybol.Journal(self.dir, resume=True)
+        j.record(os.path.join(self.dir, 'c'))
+        j.close()
+
+        j = pybol.Journal(self.dir, resume=True)
+        assert j.done(os.path.join(self.dir, 'a'))
+        assert j.done(os.path.join(self.dir, 'c'))
+        j.close()
+        with open(path) as f:
+            assert f.read() == '1\ta\n1\tc\n'
+
+    def test_interrupted_assembly_resumes(self):
+        m = pybol.Manifest(os.path.join(self.manifests_path,'recursion.yml'))
+        m.states['recursion'].files = [['random_1', ''], ['random_2', 'extra']]
+        journal = os.path.normpath(self.dir) + pybol.Journal.SUFFIX
+
+        copy = pybol.State._copy
+        copied = []
+
+        def interrupted(src, dest):
+            if copied:
+                raise RuntimeError('interrupted')
+            copy(src, dest)
+            copied.append(dest)
+
+        pybol.State._copy = staticmethod(interrupted)
+        try:
+            m.assemble('recursion', self.dir, journal=True)
+            assert False
+        except RuntimeError:
+            assert True
+        finally:
+            pybol.State._copy = staticmethod(copy)
+        assert os.path.exists(journal)
+
+        def counted(src, dest):
+            copied.append(dest)
+            copy(src, dest)
+
+        del copied[:]
+        pybol.State._copy = staticmethod(counted)
+        try:
+            m.assemble('recursion', self.dir, resume=True)
+        finally:
+            pybol.State._copy = staticmethod(copy)
+        assert copied == [os.path.join(self.dir, 'extra')]
+        assert not os.path.exists(journal)
+        assert len(os.listdir(os.path.join(self.dir, 'extra'))) == 19
+
+    def test_journal_inside_replaced_tree(self):
+        m = pybol.Manifest(os.path.join(self.manifests_path,'recursion.yml'))
+        try:
+            m.assemble('recursion', self.dir,
+                       journal=os.path.join(self.dir, 'journal'))
+            assert False
+        except ValueError:
+            assert True
+
+    def test_non_ascii_names(self):
+        name = u'été.csv'
+        with io.open(os.path.join(self.dir, name), 'w', encoding='utf-8') as f:
+            f.write(u'x')
+        j = pybol.Journal(self.dir)
+        j.record(os.path.join(self.dir, name))
+        j.close()
+        j = pybol.Journal(self.dir, resume=True)
+        assert j.done(os.path.join(self.dir, name))
+        j.close()
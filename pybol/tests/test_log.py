@@ -0,0 +1,83 @@
+import tempfile
+import logging
+import pybol
+import os
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+class Test_Log(object):
+
+    def setup_method(self):
+        self.dir = tempfile.mkdtemp()
+        self.manifests_path = 'pybol/tests/testing_files/manifests'
+
+    def teardown_method(self):
+        pybol.stop_logging()
+
+    def test_progress_summary(self):
+        handler = ListHandler()
+        pybol.start_logging(handler=handler)
+        m = pybol.Manifest(os.path.join(self.manifests_path,'recursion.yml'))
+        m.states['recursion'].files = [[os.path.join('random_1', f), f] for f in
+            os.listdir(os.path.join(m.path, 'recursion', 'random_1'))]
+        m.assemble('recursion', self.dir, progress=pybol.Progress(every=5, interval=3600))
+        pybol.stop_logging()
+        summaries = [x for x in handler.messages if x.startswith('recursion: copied')]
+        assert len(summaries) == 4
+        assert not [x for x in handler.messages if x.startswith('Copying from')]
+
+    def test_quiet(self):
+        handler = ListHandler()
+        pybol.start_logging(handler=handler)
+        m = pybol.Manifest(os.path.join(self.manifests_path,'recursion.yml'))
+        m.assemble('recursion', self.dir, progress=pybol.Progress(every=1, quiet=True))
+        pybol.stop_logging()
+        assert not [x for x in handler.messages if 'copied' in x]
+
+    def test_start_stop_logging(self):
+        pybol.start_logging(handler=ListHandler())
+        assert not logging.getLogger('PyBOL').propagate
+        pybol.stop_logging()
+        assert logging.getLogger('PyBOL').propagate
+
+    def test_stop_logging_restores_settings(self):
+        log = logging.getLogger('PyBOL')
+        log.setLevel(logging.WARNING)
+        log.propagate = False
+        try:
+            pybol.start_logging(level=logging.DEBUG, handler=ListHandler())
+            assert log.level == logging.DEBUG
+            pybol.stop_logging()
+            assert log.level == logging.WARNING
+            assert not log.propagate
+        finally:
+            log.setLevel(logging.NOTSET)
+            log.propagate = True
+
+    def test_interval_only(self):
+        handler = ListHandler()
+        pybol.start_logging(handler=handler)
+        progress = pybol.Progress(every=0, interval=3600)
+        progress.start('state', 10)
+        for i in range(10):
+            progress.update()
+        pybol.stop_logging()
+        assert not [x for x in handler.messages if 'copied' in x]
+
+    def test_progress_batched_updates(self):
+        handler = ListHandler()
+        pybol.start_logging(handler=handler)
+        progress = pybol.Progress(every=5, interval=3600)
+        progress.start('state', 12)
+        for i in range(4):
+            progress.update(3)
+        pybol.stop_logging()
+        assert handler.messages == ['state: copied 6 of 12 entries',
+                                    'state: copied 12 of 12 entries']
@@ -0,0 +1,84 @@
+import tempfile
+import pybol
+import os
+import filecmp
+import threading
+import time
+
+class Test_Scheduler(object):
+
+    def setup_method(self):
+        self.dir = tempfile.mkdtemp()
+        self.manifests_path = 'pybol/tests/testing_files/manifests'
+
+    def test_recursion(self):
+        m = pybol.Manifest(os.path.join(self.manifests_path,'recursion.yml'))
+        m.assemble('recursion', self.dir, scheduler=pybol.Scheduler(threshold=8))
+        src = os.path.join(m.path, 'recursion', 'random_1')
+        assert sorted(os.listdir(self.dir)) == sorted(os.listdir(src))
+
+    def test_mixed_sizes(self):
+        src = os.path.join(tempfile.mkdtemp(), 'mixed')
+        os.makedirs(src)
+        for i in range(20):
+            with open(os.path.join(src, 'small_{}'.format(i)), 'w') as f:
+                f.write('x')
+        with open(os.path.join(src, 'large'), 'w') as f:
+            f.write('x' * 4096)
+
+        s = pybol.State('mixed', options=['full_transfer'])
+        scheduler = pybol.Scheduler(large_workers=1, small_workers=2,
+                                    threshold=1024, default_device_limit=2)
+        s.assemble(os.path.dirname(src), self.dir, scheduler=scheduler)
+        assert len(os.listdir(self.dir)) == 21
+        assert filecmp.cmp(os.path.join(src, 'large'),
+                           os.path.join(self.dir, 'large'), shallow=False)
+
+    def test_bad_workers(self):
+        try:
+            pybol.Scheduler(large_workers=0)
+            assert False
+        except ValueError:
+            assert True
+
+    def test_fanout(self):
+        m = pybol.Manifest(os.path.join(self.manifests_path,'recursion.yml'))
+        dests = [os.path.join(self.dir, 'a'), os.path.join(self.dir, 'b')]
+        m.assemble('recursion', dests, scheduler=pybol.Scheduler(threshold=8))
+        src = os.path.join(m.path, 'recursion', 'random_1')
+        for d in dests:
+            assert sorted(os.listdir(d)) == sorted(os.listdir(src))
+
+    def test_device_limit_and_order(self):
+        src = tempfile.mkdtemp()
+        operations = []
+        for i in range(12):
+            path = os.path.join(src, 'f_{}'.format(i))
+            with open(path, 'w') as f:
+                f.write('x' * (i + 1) * 100)
+            operations.append((path, os.path.join(self.dir, 'f_{}'.format(i))))
+
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        started = []
+
+        def func(s, d):
+            with lock:
+                started.append(s)
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+
+        scheduler = pybol.Scheduler(large_workers=1, small_workers=0,
+                                    default_device_limit=2)
+        scheduler.run(operations, func)
+        sizes = [os.path.getsize(s) for s in started]
+        assert sizes == sorted(sizes, reverse=True)
+
+        scheduler = pybol.Scheduler(large_workers=2, small_workers=6,
+                                    threshold=0, default_device_limit=2)
+        scheduler.run(operations, func)
+        assert len(started) == 24
+        assert state['peak'] == 2
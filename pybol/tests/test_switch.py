@@ -0,0 +1,98 @@
+import tempfile
+import pybol
+import os
+
+class Test_Switch(object):
+
+    def setup_method(self):
+        self.dir = tempfile.mkdtemp()
+        self.manifests_path = 'pybol/tests/testing_files/manifests'
+
+    def test_switch_good_manifest(self):
+        m = pybol.Manifest(filename=os.path.join(self.manifests_path,'good_manifest.yml'))
+        m.assemble('state_a', self.dir)
+        assert os.path.exists(os.path.join(self.dir, 'data', 'file_1.csv'))
+        m.switch(self.dir, 'state_a', 'state_b')
+        assert os.listdir(os.path.join(self.dir, 'data')) == ['file_2.csv']
+        m.switch(self.dir, 'state_b', 'state_a')
+        assert os.listdir(os.path.join(self.dir, 'data')) == ['file_1.csv']
+
+    def test_switch_keeps_identical(self):
+        src = tempfile.mkdtemp()
+        for state, changed in [('a', 'old'), ('b', 'new')]:
+            os.makedirs(os.path.join(src, state))
+            with open(os.path.join(src, state, 'shared'), 'w') as f:
+                f.write('shared')
+            with open(os.path.join(src, state, 'changed'), 'w') as f:
+                f.write(changed)
+            os.utime(os.path.join(src, state, 'shared'), (1000, 1000))
+        m = pybol.Manifest()
+        m.path = src
+        m.add_state('a', files=[['shared', 'shared'], ['changed', 'changed']])
+        m.add_state('b', files=[['shared', 'shared'], ['changed', 'changed']])
+        m.assemble('a', self.dir)
+
+        shared = os.path.join(self.dir, 'shared')
+        os.utime(shared, (0, 0))
+        m.switch(self.dir, 'a', 'b')
+        assert os.stat(shared).st_mtime == 0
+        with open(os.path.join(self.dir, 'changed')) as f:
+            assert f.read() == 'new'
+
+    def test_switch_compares_bytes(self):
+        src = tempfile.mkdtemp()
+        for state in ['a', 'b']:
+            os.makedirs(os.path.join(src, state))
+            with open(os.path.join(src, state, 'shared'), 'w') as f:
+                f.write('shared')
+        m = pybol.Manifest()
+        m.path = src
+        m.add_state('a', files=[['shared', 'shared']])
+        m.add_state('b', files=[['shared', 'shared']])
+        m.assemble('a', self.dir)
+
+        shared = os.path.join(self.dir, 'shared')
+        os.utime(shared, (0, 0))
+        m.switch(self.dir, 'a', 'b')
+        assert os.stat(shared).st_mtime == 0
+
+    def test_switch_same_metadata_different_content(self):
+        src = tempfile.mkdtemp()
+        for state, content in [('a', 'AAAA'), ('b', 'BBBB')]:
+            os.makedirs(os.path.join(src, state))
+            path = os.path.join(src, state, 'param.dat')
+            with open(path, 'w') as f:
+                f.write(content)
+            os.utime(path, (1000, 1000))
+        m = pybol.Manifest()
+        m.path = src
+        m.add_state('a', files=[['param.dat', 'param.dat']])
+        m.add_state('b', files=[['param.dat', 'param.dat']])
+        param = os.path.join(self.dir, 'param.dat')
+
+        m.assemble('a', self.dir)
+        m.switch(self.dir, 'a', 'b', trust_mtime=True)
+        with open(param) as f:
+            assert f.read() == 'AAAA'
+        m.switch(self.dir, 'a', 'b')
+        with open(param) as f:
+            assert f.read() == 'BBBB'
+
+    def test_switch_prunes_empty_dirs(self):
+        src = tempfile.mkdtemp()
+        for state in ['a', 'b']:
+            os.makedirs(os.path.join(src, state))
+            with open(os.path.join(src, state, 'f'), 'w') as f:
+                f.write(state)
+        m = pybol.Manifest()
+        m.path = src
+        m.add_state('a', files=[['f', 'one/deep/f'], ['f', 'keep/f']])
+        m.add_state('b', files=[['f', 'two/deep/f']])
+        m.assemble('a', self.dir)
+        os.remove(os.path.join(self.dir, 'keep', 'f'))
+        with open(os.path.join(self.dir, 'keep', 'other'), 'w') as f:
+            f.write('not part of the state')
+
+        m.switch(self.dir, 'a', 'b')
+        assert sorted(os.listdir(self.dir)) == ['keep', 'two']
+        assert os.listdir(os.path.join(self.dir, 'keep')) == ['other']
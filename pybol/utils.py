@@ -0,0 +1,130 @@
+"""
+:mod:`pybol.utils` --- Filesystem helpers
+=========================================
+
+Small filesystem helpers shared by the assembly machinery.
+
+"""
+
+
+import os
+import errno
+import filecmp
+
+
+def path_size(path):
+    """Returns the size of a file in bytes, or the total size of all files
+    below a directory.
+
+    Keyword arguments:
+    path -- file or directory path.
+    """
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def makedirs(path):
+    """Creates a directory tree, tolerating one that already exists.
+
+    Keyword arguments:
+    path -- directory path.
+    """
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(path):
+            raise
+
+
+def device(path):
+    """Returns the device id of the volume holding `path`. Walks up to the
+    nearest existing parent for paths that have not been created yet.
+
+    Keyword arguments:
+    path -- file or directory path.
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return os.stat(path).st_dev
+
+
+def unshare(path):
+    """Removes a file that is hardlinked elsewhere, so that writing `path`
+    afterwards does not change the other links.
+
+    Keyword arguments:
+    path -- file path.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return
+    if st.st_nlink > 1:
+        os.remove(path)
+
+
+def same_content(a, b, trust_mtime=False):
+    """Returns True if two files or directory trees hold the same content.
+
+    Paths resolving to the same location are equal and files of different
+    sizes differ; all other files are compared byte by byte.
+
+    Keyword arguments:
+    a -- file or directory path.
+    b -- file or directory path.
+    trust_mtime -- consider files of equal size and modification time equal
+                   without reading them.
+    """
+    if os.path.realpath(a) == os.path.realpath(b):
+        return True
+    if not (os.path.exists(a) and os.path.exists(b)):
+        return False
+    if os.path.isdir(a) != os.path.isdir(b):
+        return False
+    if not os.path.isdir(a):
+        sa, sb = os.stat(a), os.stat(b)
+        if sa.st_size != sb.st_size:
+            return False
+        if trust_mtime and sa.st_mtime == sb.st_mtime:
+            return True
+        return filecmp.cmp(a, b, shallow=False)
+
+    names = sorted(os.listdir(a))
+    if names != sorted(os.listdir(b)):
+        return False
+    for name in names:
+        if not same_content(os.path.join(a, name), os.path.join(b, name),
+                            trust_mtime=trust_mtime):
+            return False
+    return True
+
+
+def prune(path, stop):
+    """Removes `path` and its parents while they are empty directories,
+    without going above `stop`.
+
+    Keyword arguments:
+    path -- directory path.
+    stop -- directory that is never removed.
+    """
+    stop = os.path.abspath(stop)
+    path = os.path.abspath(path)
+    while path != stop and path.startswith(stop + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)